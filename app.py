@@ -1,20 +1,22 @@
 from __future__ import annotations
 
+import csv
 import io
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import streamlit as st
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER
+try:
+    import orjson  # optional: native JSON serializer, handles numpy arrays directly
+except ImportError:
+    orjson = None
 
 from binomial_engine import BinomialModel, MultiLegGreeksCalculator
 from strategy_manager import StrategyParams, ShortIronCondor, StrategyExecutor
@@ -27,29 +29,196 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Figure layouts shared by the figure builders (rebuilt with the script on each rerun: two small dicts)
+PAYOFF_LAYOUT = dict(
+    title="Payoff à l'échéance",
+    xaxis_title="Spot à l'échéance",
+    yaxis_title="P&L (€ / contrat)",
+    hovermode="x unified",
+    height=420,
+    margin=dict(l=40, r=40, t=60, b=40),
+)
+GREEKS_LAYOUT = dict(height=600, showlegend=False, hovermode="x unified")
+
 
-def triangular_dict_to_df(level_dict: dict, N: int) -> pd.DataFrame:
+def triangular_to_df(tree: np.ndarray) -> pd.DataFrame:
     """
-    Convertit un arbre stocké en dictionnaire triangulaire {i:{j:val}}
+    Convertit un arbre triangulaire (tableau (N+1, N+1), NaN au-dessus de la diagonale)
     en tableau lisible (DataFrame).
     - i = niveau de temps (0..N)
     - j = nombre de mouvements "up" (0..i)
     """
-    data = []
-    for i in range(N + 1):
-        row = []
-        for j in range(N + 1):
-            if i in level_dict and j in level_dict[i]:
-                row.append(level_dict[i][j])
-            else:
-                row.append(np.nan)
-        data.append(row)
-
-    df = pd.DataFrame(data, columns=[f"j={j}" for j in range(N + 1)])
-    df.insert(0, "niveau i", [f"i={i}" for i in range(N + 1)])
+    n_levels = tree.shape[0]
+    df = pd.DataFrame(tree, columns=[f"j={j}" for j in range(n_levels)])
+    df.insert(0, "niveau i", [f"i={i}" for i in range(n_levels)])
     return df
 
 
+def columns_to_markdown(columns: dict) -> str:
+    """
+    Petit tableau markdown (sans index) à partir d'un dict {en-tête: colonne},
+    pour éviter un DataFrame pandas sur quelques lignes.
+    """
+    headers = list(columns)
+
+    def fmt(v):
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join(map(fmt, row)) + " |" for row in zip(*columns.values())]
+    return "\n".join(lines)
+
+
+def rows_to_markdown(rows: list) -> str:
+    """
+    Même tableau à partir d'une liste de dicts (une par ligne).
+    """
+    return columns_to_markdown({h: [row[h] for row in rows] for h in rows[0]})
+
+
+# Lifetime of downloaded market data, prefetched or not
+MARKET_TTL_S = 900
+
+
+def _timed_market_data(ticker: str, period: str) -> tuple:
+    return MarketDataProvider(ticker, period=period), time.monotonic()
+
+
+@st.cache_resource(show_spinner=False)
+def market_prefetch() -> dict:
+    """
+    Historiques 1 an de toutes les actions proposées, téléchargés en arrière-plan
+    au premier passage en mode marché. Un seul worker : les appels Yahoo sont
+    sérialisés de toute façon (cf. market_data._YF_LOCK).
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="market-prefetch")
+    return {ticker: pool.submit(_timed_market_data, ticker, "1y") for ticker in AVAILABLE_STOCKS}
+
+
+@st.cache_resource(ttl=MARKET_TTL_S, show_spinner=False)
+def get_market_data(ticker: str, period: str = "1y") -> MarketDataProvider:
+    """
+    Données de marché partagées entre sessions et reruns pendant 15 min.
+    Un échec de téléchargement lève ValueError et n'est donc pas mis en cache.
+    """
+    market_data = None
+    future = market_prefetch().pop(ticker, None) if period == "1y" else None
+    if future is not None and not future.cancel():
+        prefetched, fetched_at = future.result()
+        # A prefetch older than the TTL would be served stale for another 15 min: download again
+        if time.monotonic() - fetched_at < MARKET_TTL_S:
+            market_data = prefetched
+    if market_data is None:
+        market_data = MarketDataProvider(ticker, period=period)
+    if market_data.data is None or market_data.data.empty:
+        raise ValueError(f"No market data for {ticker}")
+    return market_data
+
+
+@st.cache_data(ttl=MARKET_TTL_S, show_spinner=False)
+def market_summary(ticker: str, period: str = "1y") -> dict:
+    """
+    Spot et volatilité réalisée de l'action, recalculés au plus une fois toutes les 15 min.
+    """
+    return get_market_data(ticker, period=period).get_summary()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_payoff_curve(pricing_key: tuple, spot_range, _strategy: ShortIronCondor) -> np.ndarray:
+    """
+    P&L par action à l'échéance sur spot_range. La stratégie est identifiée par
+    pricing_key (l'objet lui-même n'est pas haché).
+    """
+    return _strategy.payoff_curve(spot_range)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_tree_tables(spot, strikes: tuple, interest_rate, time_to_maturity, volatility, n_steps) -> dict:
+    """
+    Arbres CRR d'affichage pour toutes les jambes en une fois (tableaux prêts à afficher) :
+    changer de jambe dans le sélecteur ne relance aucun calcul.
+    """
+    tables = {"call_prices": {}, "put_prices": {}}
+    for K in strikes:
+        tree = BinomialModel(
+            S=float(spot),
+            K=float(K),
+            r=float(interest_rate),
+            T=float(time_to_maturity),
+            sigma=float(volatility),
+            N=int(n_steps),
+        ).get_tree_data()
+        if "error" in tree:
+            return {"error": tree["error"]}
+        # The stock tree does not depend on the strike
+        if "stock_prices" not in tables:
+            tables["stock_prices"] = triangular_to_df(tree["stock_prices"])
+        for opt_key in ("call_prices", "put_prices"):
+            tables[opt_key][K] = triangular_to_df(tree[opt_key])
+    return tables
+
+
+@st.cache_resource(show_spinner=False)
+def greeks_pool() -> ThreadPoolExecutor:
+    """
+    Pool du calcul des courbes de Greeks en arrière-plan, pendant que le reste de
+    la page s'affiche (le noyau CRR relâche le GIL).
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="greeks")
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def greeks_spot_grid(spot: float) -> tuple:
+    """
+    Grille de spots des Greeks (±30 %) et position du spot courant dans celle-ci.
+    Ne dépend que du spot : partagée entre reruns et sessions, donc en lecture seule.
+    """
+    # The current spot is part of the grid so its Greeks are read from the curve, not repriced
+    grid = np.sort(np.append(np.linspace(spot * 0.7, spot * 1.3, 60), spot))
+    grid.setflags(write=False)
+    return grid, int(np.searchsorted(grid, spot))
+
+
+GREEKS_PANELS = (
+    ("Delta", "delta", 1, 1),
+    ("Gamma", "gamma", 1, 2),
+    ("Theta/jour", "theta_per_day", 2, 1),
+    ("Vega (+1%)", "vega_per_1pct_vol", 2, 2),
+)
+
+
+def greeks_figure(spot_range, curves: dict, spot_price: float) -> go.Figure:
+    """
+    Figure 2x2 des Greeks (unités affichées) : une seule charge Plotly pour les quatre panneaux.
+    """
+    # Plotly gets float32 copies (half the payload); the float64 curves are kept for the export
+    x = np.asarray(spot_range, dtype=np.float32)
+
+    # Y-axis ranges of the four panels in one reduction: [min - 20% |max|, max + 20% |max|]
+    stats = np.stack([curves[key] for _, key, _, _ in GREEKS_PANELS]).astype(float)
+    amax = np.abs(stats).max(axis=1)
+    axis_ranges = np.stack([stats.min(axis=1) - 0.2 * amax, stats.max(axis=1) + 0.2 * amax], axis=1)
+    axis_ranges[amax == 0] = [-0.01, 0.01]
+
+    fig = make_subplots(
+        rows=2, cols=2,
+        shared_xaxes=True,
+        subplot_titles=[name for name, _, _, _ in GREEKS_PANELS],
+        vertical_spacing=0.12,
+    )
+    for (name, key, row, col), y_range in zip(GREEKS_PANELS, axis_ranges.tolist()):
+        fig.add_trace(go.Scattergl(x=x, y=curves[key].astype(np.float32), mode="lines", fill="tozeroy", name=name), row=row, col=col)
+        fig.add_hline(y=0, line_dash="dash", opacity=0.3, row=row, col=col)
+        fig.update_yaxes(title_text=name, range=y_range, row=row, col=col)
+    fig.add_vline(x=spot_price, line_dash="dash", opacity=0.6, row="all", col="all")
+    fig.update_xaxes(title_text="Spot", row=2)
+    fig.update_layout(**GREEKS_LAYOUT)
+    return fig
+
+
+SCENARIO_KEYS = ("crash_20", "down_10", "current", "up_10", "peak_20")
+
+
 def generate_export_data(
     spot_price, K1, K2, K3, K4,
     rate_pct, expiration_years,
@@ -60,6 +229,13 @@ def generate_export_data(
     greeks_curve_ui,
     spot_range
 ):
+    # One payoff evaluation shared by the exported curve and the five scenarios
+    scenario_moves = np.array([0.8, 0.9, 1.0, 1.1, 1.2])
+    n_curve = len(spot_range)
+    payoff = strategy.payoff_curve(np.concatenate([spot_range, spot_price * scenario_moves]))
+    payoff_curve_contract = payoff[:n_curve] * multiplier
+    scenario_pnl = payoff[n_curve:] * quantity * multiplier
+
     return {
         "timestamp": datetime.now().isoformat(),
         "strategy_type": "Short Iron Condor",
@@ -82,26 +258,31 @@ def generate_export_data(
             "theta_per_day": float(current_greeks_ui["theta_per_day"]),
             "vega_per_1pct_vol": float(current_greeks_ui["vega_per_1pct_vol"]),
         },
+        # Curves stay ndarrays, in float64: orjson (OPT_SERIALIZE_NUMPY) and the json fallback
+        # (_json_default) then write the same shortest reprs
         "greeks_curve_ui": {
-            "spot_prices": [float(x) for x in spot_range.tolist()],
-            "delta": [float(x) for x in greeks_curve_ui["delta"].tolist()],
-            "gamma": [float(x) for x in greeks_curve_ui["gamma"].tolist()],
-            "theta_per_day": [float(x) for x in greeks_curve_ui["theta_per_day"].tolist()],
-            "vega_per_1pct_vol": [float(x) for x in greeks_curve_ui["vega_per_1pct_vol"].tolist()],
-            "payoff_per_contract": [float(strategy.payoff_at_maturity(s) * multiplier) for s in spot_range],
-        },
-        "scenarios_total_pnl_eur": {
-            "crash_20": float(strategy.payoff_at_maturity(spot_price * 0.8) * quantity * multiplier),
-            "down_10": float(strategy.payoff_at_maturity(spot_price * 0.9) * quantity * multiplier),
-            "current": float(strategy.payoff_at_maturity(spot_price) * quantity * multiplier),
-            "up_10": float(strategy.payoff_at_maturity(spot_price * 1.1) * quantity * multiplier),
-            "peak_20": float(strategy.payoff_at_maturity(spot_price * 1.2) * quantity * multiplier),
+            "spot_prices": np.asarray(spot_range, dtype=float),
+            "delta": np.asarray(greeks_curve_ui["delta"], dtype=float),
+            "gamma": np.asarray(greeks_curve_ui["gamma"], dtype=float),
+            "theta_per_day": np.asarray(greeks_curve_ui["theta_per_day"], dtype=float),
+            "vega_per_1pct_vol": np.asarray(greeks_curve_ui["vega_per_1pct_vol"], dtype=float),
+            "payoff_per_contract": payoff_curve_contract,
         },
+        "scenarios_total_pnl_eur": dict(zip(SCENARIO_KEYS, scenario_pnl.tolist())),
     }
 
 
-def export_to_json(export_data) -> str:
-    return json.dumps(export_data, indent=2)
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.astype(float).tolist()
+    return float(obj)
+
+
+def export_to_json(export_data) -> bytes:
+    # Bytes go straight to st.download_button: no decode / re-encode round trip
+    if orjson is not None:
+        return orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(export_data, indent=2, default=_json_default).encode("utf-8")
 
 
 def export_to_csv(export_data) -> str:
@@ -110,61 +291,105 @@ def export_to_csv(export_data) -> str:
     g = export_data["current_greeks_ui"]
     scen = export_data["scenarios_total_pnl_eur"]
 
-    csv_buffer.write("CONFIGURATION\n")
-    csv_buffer.write(f"Timestamp,{export_data['timestamp']}\n")
-    csv_buffer.write(f"Strategy,{export_data['strategy_type']}\n")
-    csv_buffer.write(f"Spot,€{cfg['spot_price']}\n")
-    csv_buffer.write(f"K1,€{cfg['K1']}\n")
-    csv_buffer.write(f"K2,€{cfg['K2']}\n")
-    csv_buffer.write(f"K3,€{cfg['K3']}\n")
-    csv_buffer.write(f"K4,€{cfg['K4']}\n")
-    csv_buffer.write(f"Rate (%),{cfg['interest_rate_pct']}\n")
-    csv_buffer.write(f"T (years),{cfg['time_to_expiration_years']}\n")
-    csv_buffer.write(f"Vol (%),{cfg['volatility_pct']}\n")
-    csv_buffer.write(f"N steps,{cfg['binomial_steps']}\n")
-    csv_buffer.write(f"Quantity,{cfg['quantity_contracts']}\n")
-    csv_buffer.write(f"Multiplier,{cfg['multiplier']}\n\n")
-
-    csv_buffer.write("GREEKS (UI)\n")
-    csv_buffer.write(f"Delta,{g['delta']}\n")
-    csv_buffer.write(f"Gamma,{g['gamma']}\n")
-    csv_buffer.write(f"Theta/day,{g['theta_per_day']}\n")
-    csv_buffer.write(f"Vega(+1%),{g['vega_per_1pct_vol']}\n\n")
-
-    csv_buffer.write("SCENARIOS (TOTAL P&L)\n")
-    csv_buffer.write(f"Crash -20%,{scen['crash_20']}\n")
-    csv_buffer.write(f"Down -10%,{scen['down_10']}\n")
-    csv_buffer.write(f"Current,{scen['current']}\n")
-    csv_buffer.write(f"Up +10%,{scen['up_10']}\n")
-    csv_buffer.write(f"Peak +20%,{scen['peak_20']}\n")
+    rows = [
+        ("CONFIGURATION",),
+        ("Timestamp", export_data["timestamp"]),
+        ("Strategy", export_data["strategy_type"]),
+        ("Spot", f"€{cfg['spot_price']}"),
+        ("K1", f"€{cfg['K1']}"),
+        ("K2", f"€{cfg['K2']}"),
+        ("K3", f"€{cfg['K3']}"),
+        ("K4", f"€{cfg['K4']}"),
+        ("Rate (%)", cfg["interest_rate_pct"]),
+        ("T (years)", cfg["time_to_expiration_years"]),
+        ("Vol (%)", cfg["volatility_pct"]),
+        ("N steps", cfg["binomial_steps"]),
+        ("Quantity", cfg["quantity_contracts"]),
+        ("Multiplier", cfg["multiplier"]),
+        (),
+        ("GREEKS (UI)",),
+        ("Delta", g["delta"]),
+        ("Gamma", g["gamma"]),
+        ("Theta/day", g["theta_per_day"]),
+        ("Vega(+1%)", g["vega_per_1pct_vol"]),
+        (),
+        ("SCENARIOS (TOTAL P&L)",),
+        ("Crash -20%", scen["crash_20"]),
+        ("Down -10%", scen["down_10"]),
+        ("Current", scen["current"]),
+        ("Up +10%", scen["up_10"]),
+        ("Peak +20%", scen["peak_20"]),
+    ]
+    csv.writer(csv_buffer, lineterminator="\n").writerows(rows)
 
     return csv_buffer.getvalue()
 
 
+@st.cache_resource(show_spinner=False)
+def pdf_styles() -> dict:
+    """
+    Styles et largeurs de colonnes ReportLab du rapport, construits une seule fois
+    par processus (ReportLab reste hors du chemin d'import de l'application).
+    Streamlit ré-exécute ce script à chaque rerun : un lru_cache serait perdu.
+    """
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=18,
+            textColor=colors.HexColor("#1f77b4"),
+            spaceAfter=10,
+            alignment=TA_CENTER,
+            fontName="Helvetica-Bold",
+        ),
+        "heading": ParagraphStyle(
+            "CustomHeading",
+            parent=styles["Heading2"],
+            fontSize=12,
+            textColor=colors.HexColor("#2ca02c"),
+            spaceAfter=6,
+            spaceBefore=8,
+            fontName="Helvetica-Bold",
+        ),
+        "normal": styles["Normal"],
+        "config_table": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ]),
+        "greeks_table": TableStyle([
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("BACKGROUND", (0, 0), (-1, -1), colors.lightblue),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ]),
+        "config_col_widths": [2.8 * inch, 2.4 * inch],
+        "greeks_col_widths": [1.4 * inch, 2.0 * inch, 1.8 * inch],
+    }
+
+
 def export_to_pdf(export_data, capital: float) -> bytes:
+    # ReportLab is only needed for this export: keep it off the app's import path
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
     pdf_buffer = io.BytesIO()
     doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
 
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle",
-        parent=styles["Heading1"],
-        fontSize=18,
-        textColor=colors.HexColor("#1f77b4"),
-        spaceAfter=10,
-        alignment=TA_CENTER,
-        fontName="Helvetica-Bold",
-    )
-    heading_style = ParagraphStyle(
-        "CustomHeading",
-        parent=styles["Heading2"],
-        fontSize=12,
-        textColor=colors.HexColor("#2ca02c"),
-        spaceAfter=6,
-        spaceBefore=8,
-        fontName="Helvetica-Bold",
-    )
-    normal_style = styles["Normal"]
+    styles = pdf_styles()
+    title_style = styles["title"]
+    heading_style = styles["heading"]
+    normal_style = styles["normal"]
 
     elements = []
     elements.append(Paragraph("Rapport - Short Iron Condor (Binomial CRR)", title_style))
@@ -191,15 +416,8 @@ def export_to_pdf(export_data, capital: float) -> bytes:
         ["Multiplicateur", f"{cfg['multiplier']}"],
         ["Capital", f"€{capital:.2f}"],
     ]
-    t = Table(config_data, colWidths=[2.8 * inch, 2.4 * inch])
-    t.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1f77b4")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-    ]))
+    t = Table(config_data, colWidths=styles["config_col_widths"])
+    t.setStyle(styles["config_table"])
     elements.append(t)
     elements.append(Spacer(1, 0.15 * inch))
 
@@ -212,13 +430,9 @@ def export_to_pdf(export_data, capital: float) -> bytes:
             ["Theta/jour", f"{g['theta_per_day']:.6f}", "par jour"],
             ["Vega (+1%)", f"{g['vega_per_1pct_vol']:.6f}", "par +1% vol"],
         ],
-        colWidths=[1.4 * inch, 2.0 * inch, 1.8 * inch],
+        colWidths=styles["greeks_col_widths"],
     )
-    tg.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-        ("BACKGROUND", (0, 0), (-1, -1), colors.lightblue),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-    ]))
+    tg.setStyle(styles["greeks_table"])
     elements.append(tg)
 
     doc.build(elements)
@@ -248,11 +462,11 @@ def main():
             )
 
             with st.spinner("Récupération des données de marché..."):
-                market_data = MarketDataProvider(selected_stock, period="1y")
-                if market_data.data is None or market_data.data.empty:
+                try:
+                    summary = market_summary(selected_stock, period="1y")
+                except ValueError:
                     st.error("Impossible de récupérer les données (Yahoo Finance).")
                     st.stop()
-                summary = market_data.get_summary()
 
             spot_price = float(summary["price"])
             vol_decimal = float(summary["volatility"])
@@ -313,9 +527,43 @@ def main():
         multiplier=100,
     )
 
-    strategy = ShortIronCondor(params)
+    # Reuse the priced strategy across reruns that don't touch pricing inputs (capital, expanders...)
+    pricing_key = (
+        float(spot_price), float(K1), float(K2), float(K3), float(K4),
+        float(rate_decimal), float(maturity), float(vol_decimal), int(N_steps),
+    )
+    spot_range_g, spot_idx = greeks_spot_grid(float(spot_price))
+    legs_config = [
+        {"K": K1, "type": "put", "sign": +1},
+        {"K": K2, "type": "put", "sign": -1},
+        {"K": K3, "type": "call", "sign": -1},
+        {"K": K4, "type": "call", "sign": +1},
+    ]
+
+    # Start the Greeks curve now; it is collected in the Greeks section. Reruns from
+    # unrelated widgets (tree viewer, capital...) reuse this session's curves and figure
+    greeks_future = None
+    if st.session_state.get("greeks_key") != pricing_key:
+        greeks_future = greeks_pool().submit(
+            MultiLegGreeksCalculator(
+                spot_range=spot_range_g,
+                legs=legs_config,
+                interest_rate=rate_decimal,
+                time_to_maturity=maturity,
+                volatility=vol_decimal,
+                n_steps=N_steps,
+            ).calculate_strategy_greeks
+        )
+
+    if st.session_state.get("strategy_key") != pricing_key:
+        st.session_state["strategy"] = ShortIronCondor(params)
+        st.session_state["strategy_details"] = st.session_state["strategy"].get_strategy_details()
+        st.session_state["strategy_key"] = pricing_key
+
+    strategy = st.session_state["strategy"]
+    details = st.session_state["strategy_details"]
     executor = StrategyExecutor(float(capital))
-    details = strategy.get_strategy_details()
+    quantity = executor.max_quantity(strategy)
 
     st.subheader("Présentation de la stratégie")
     st.write(
@@ -325,8 +573,7 @@ def main():
 
     st.divider()
     st.subheader("Jambes de la stratégie")
-    legs_df = pd.DataFrame(details["legs"])
-    st.dataframe(legs_df, width="stretch", hide_index=True)
+    st.markdown(rows_to_markdown(details["legs"]))
 
     multiplier = params.multiplier
 
@@ -359,7 +606,6 @@ def main():
 
     with c2:
         st.subheader("Gestion du capital")
-        quantity = executor.max_quantity(strategy)
         exec_sum = executor.get_execution_summary(strategy, quantity)
 
         st.metric("Nombre maximum de contrats", f"{quantity}")
@@ -370,50 +616,49 @@ def main():
         st.divider()
         st.subheader("Prix des options (binomial CRR)")
 
-        def price_leg(opt_type: str, strike: float) -> float:
-            m = BinomialModel(
-                S=float(spot_price),
-                K=float(strike),
-                r=float(rate_decimal),
-                T=float(maturity),
-                sigma=float(vol_decimal),
-                N=int(N_steps),
-            )
-            return m.price_call() if opt_type == "call" else m.price_put()
-
-        legs_desc = [("put", +1, K1), ("put", -1, K2), ("call", -1, K3), ("call", +1, K4)]
-
-        rows = []
-        for opt, sign, K in legs_desc:
-            px = price_leg(opt, K)
-            rows.append({
-                "Option": f"{opt.upper()} @ {K:.2f}",
-                "Position": "LONG" if sign > 0 else "SHORT",
-                "Prix €/action": float(px),
-                "Prix €/contrat": float(px * multiplier),
-            })
-        st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+        # Leg prices come from the cached strategy details (same order: K1 put, K2 put, K3 call, K4 call)
+        legs = details["legs"]
+        st.markdown(columns_to_markdown({
+            "Option": [f"{leg['Type']} @ {leg['Strike']:.2f}" for leg in legs],
+            "Position": [leg["Position"] for leg in legs],
+            "Prix €/action": [leg["Prix (€/action)"] for leg in legs],
+            "Prix €/contrat": [leg["Prix (€/action)"] * multiplier for leg in legs],
+        }))
 
     st.divider()
     st.header("Payoff à l'échéance")
 
     min_spot = float(spot_price) * 0.7
     max_spot = float(spot_price) * 1.3
-    spot_range = np.linspace(min_spot, max_spot, 250)
+    # Payoff is piecewise linear with kinks at the strikes: the range ends plus the kinks are exact
+    kinks = np.array([K1, K2, K3, K4], dtype=float)
+    kinks = kinks[(kinks > min_spot) & (kinks < max_spot)]
+    knots = np.unique(np.concatenate([[min_spot, max_spot], kinks]))
+    knot_payoff = cached_payoff_curve(pricing_key, knots, strategy) * multiplier
+
+    # Split the segments at their zero crossings so the gain / loss shading meets exactly at 0
+    x_a, x_b = knots[:-1], knots[1:]
+    y_a, y_b = knot_payoff[:-1], knot_payoff[1:]
+    crosses = y_a * y_b < 0
+    x_zero = x_a[crosses] - y_a[crosses] * (x_b[crosses] - x_a[crosses]) / (y_b[crosses] - y_a[crosses])
+    spot_range = np.concatenate([knots, x_zero])
+    order = np.argsort(spot_range, kind="stable")
+    # Display-only arrays: float32 halves the Plotly payload
+    spot_range = spot_range[order].astype(np.float32)
+    payoff_contract = np.concatenate([knot_payoff, np.zeros_like(x_zero)])[order].astype(np.float32)
 
-    payoff_contract = strategy.payoff_curve(spot_range) * multiplier
     payoff_profit = np.where(payoff_contract >= 0, payoff_contract, np.nan)
-    payoff_loss = np.where(payoff_contract < 0, payoff_contract, np.nan)
+    payoff_loss = np.where(payoff_contract <= 0, payoff_contract, np.nan)
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=spot_range, y=payoff_profit,
         mode="lines", name="Gain",
         line=dict(color="green", width=3),
         fill="tozeroy", fillcolor="rgba(0, 128, 0, 0.18)",
         hovertemplate="Spot: €%{x:.2f}<br>P&L: €%{y:.2f}<extra></extra>",
     ))
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=spot_range, y=payoff_loss,
         mode="lines", name="Perte",
         line=dict(color="red", width=3),
@@ -426,14 +671,7 @@ def main():
         fig.add_vline(x=float(k), line_dash="dash", line_color="gray", opacity=0.6)
     fig.add_vline(x=float(spot_price), line_dash="dot", line_color="black", opacity=0.7)
 
-    fig.update_layout(
-        title="Payoff à l'échéance",
-        xaxis_title="Spot à l'échéance",
-        yaxis_title="P&L (€ / contrat)",
-        hovermode="x unified",
-        height=420,
-        margin=dict(l=40, r=40, t=60, b=40),
-    )
+    fig.update_layout(**PAYOFF_LAYOUT)
     st.plotly_chart(fig, width="stretch")
 
     st.divider()
@@ -441,115 +679,50 @@ def main():
 
     with st.expander("Afficher un arbre binomial (N réduit pour l'affichage)"):
         tree_N = st.slider("Nombre de pas pour l'affichage (N ≤ 10)", 1, 10, 5, 1)
-        tree_leg = st.selectbox("Jambe à afficher", options=["K1 (put)", "K2 (put)", "K3 (call)", "K4 (call)"], index=1)
-
-        if "K1" in tree_leg:
-            legK, legType = K1, "put"
-        elif "K2" in tree_leg:
-            legK, legType = K2, "put"
-        elif "K3" in tree_leg:
-            legK, legType = K3, "call"
-        else:
-            legK, legType = K4, "call"
-
-        model_tree = BinomialModel(
-            S=float(spot_price),
-            K=float(legK),
-            r=float(rate_decimal),
-            T=float(maturity),
-            sigma=float(vol_decimal),
-            N=int(tree_N),
+        tree_legs = {
+            "K1 (put)": (K1, "put"),
+            "K2 (put)": (K2, "put"),
+            "K3 (call)": (K3, "call"),
+            "K4 (call)": (K4, "call"),
+        }
+        tree_leg = st.selectbox("Jambe à afficher", options=list(tree_legs), index=1)
+        legK, legType = tree_legs[tree_leg]
+
+        tree = cached_tree_tables(
+            spot_price, (K1, K2, K3, K4), rate_decimal, maturity, vol_decimal, tree_N
         )
-        tree = model_tree.get_tree_data()
         if "error" in tree:
             st.error(tree["error"])
         else:
             st.caption(f"Option affichée : {legType.upper()} (K={legK:.2f}), N={tree_N}")
 
-            stock_df = triangular_dict_to_df(tree["stock_prices"], tree_N)
             st.subheader("Arbre des prix du sous-jacent")
-            st.dataframe(stock_df, width="stretch")
+            st.dataframe(tree["stock_prices"], width="stretch")
 
             opt_key = "call_prices" if legType == "call" else "put_prices"
-            opt_df = triangular_dict_to_df(tree[opt_key], tree_N)
             st.subheader(f"Arbre des prix d'option ({legType.upper()})")
-            st.dataframe(opt_df, width="stretch")
+            st.dataframe(tree[opt_key][legK], width="stretch")
 
     st.divider()
-    st.header("Greeks (binomial, différences finies)")
-
-    spot_range_g = np.linspace(spot_price * 0.7, spot_price * 1.3, 60)
-
-    legs_config = [
-        {"K": K1, "type": "put", "sign": +1},
-        {"K": K2, "type": "put", "sign": -1},
-        {"K": K3, "type": "call", "sign": -1},
-        {"K": K4, "type": "call", "sign": +1},
-    ]
-
-    greeks_calc = MultiLegGreeksCalculator(
-        spot_range=spot_range_g,
-        legs=legs_config,
-        interest_rate=rate_decimal,
-        time_to_maturity=maturity,
-        volatility=vol_decimal,
-        n_steps=N_steps,
-    )
-    g_curve = greeks_calc.calculate_strategy_greeks()
-
-    delta = g_curve["delta"]
-    gamma = g_curve["gamma"]
-    theta_day = g_curve["theta"] / 365.0
-    vega_1pct = g_curve["vega"] / 100.0
-
-    def axis_range(arr):
-        m = float(np.max(np.abs(arr)))
-        if m == 0:
-            return [-0.01, 0.01]
-        return [float(np.min(arr) - 0.2 * m), float(np.max(arr) + 0.2 * m)]
-
-    colA, colB = st.columns(2)
-    with colA:
-        fig1 = go.Figure()
-        fig1.add_trace(go.Scatter(x=spot_range_g, y=delta, mode="lines", fill="tozeroy", name="Delta"))
-        fig1.add_hline(y=0, line_dash="dash", opacity=0.3)
-        fig1.add_vline(x=spot_price, line_dash="dash", opacity=0.6)
-        fig1.update_layout(height=300, xaxis_title="Spot", yaxis_title="Delta", yaxis=dict(range=axis_range(delta)))
-        st.plotly_chart(fig1, width="stretch")
-
-    with colB:
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(x=spot_range_g, y=gamma, mode="lines", fill="tozeroy", name="Gamma"))
-        fig2.add_hline(y=0, line_dash="dash", opacity=0.3)
-        fig2.add_vline(x=spot_price, line_dash="dash", opacity=0.6)
-        fig2.update_layout(height=300, xaxis_title="Spot", yaxis_title="Gamma", yaxis=dict(range=axis_range(gamma)))
-        st.plotly_chart(fig2, width="stretch")
-
-    colC, colD = st.columns(2)
-    with colC:
-        fig3 = go.Figure()
-        fig3.add_trace(go.Scatter(x=spot_range_g, y=theta_day, mode="lines", fill="tozeroy", name="Theta/jour"))
-        fig3.add_hline(y=0, line_dash="dash", opacity=0.3)
-        fig3.add_vline(x=spot_price, line_dash="dash", opacity=0.6)
-        fig3.update_layout(height=300, xaxis_title="Spot", yaxis_title="Theta/jour", yaxis=dict(range=axis_range(theta_day)))
-        st.plotly_chart(fig3, width="stretch")
-
-    with colD:
-        fig4 = go.Figure()
-        fig4.add_trace(go.Scatter(x=spot_range_g, y=vega_1pct, mode="lines", fill="tozeroy", name="Vega (+1%)"))
-        fig4.add_hline(y=0, line_dash="dash", opacity=0.3)
-        fig4.add_vline(x=spot_price, line_dash="dash", opacity=0.6)
-        fig4.update_layout(height=300, xaxis_title="Spot", yaxis_title="Vega (+1%)", yaxis=dict(range=axis_range(vega_1pct)))
-        st.plotly_chart(fig4, width="stretch")
+    st.header("Greeks (arbre CRR, vega par différences finies)")
+
+    if greeks_future is not None:
+        g_curve = greeks_future.result()
+        greeks_curve_ui = {
+            "delta": g_curve["delta"],
+            "gamma": g_curve["gamma"],
+            "theta_per_day": g_curve["theta"] / 365.0,
+            "vega_per_1pct_vol": g_curve["vega"] / 100.0,
+        }
+        st.session_state["greeks_curve_ui"] = greeks_curve_ui
+        st.session_state["greeks_figure"] = greeks_figure(spot_range_g, greeks_curve_ui, spot_price)
+        st.session_state["greeks_key"] = pricing_key
+
+    greeks_curve_ui = st.session_state["greeks_curve_ui"]
+    st.plotly_chart(st.session_state["greeks_figure"], width="stretch")
 
     st.subheader("Greeks au spot actuel (unités affichées)")
-    g0 = greeks_calc.get_greeks_at_spot(float(spot_price))
-    current_greeks_ui = {
-        "delta": g0["delta"],
-        "gamma": g0["gamma"],
-        "theta_per_day": g0["theta"] / 365.0,
-        "vega_per_1pct_vol": g0["vega"] / 100.0,
-    }
+    current_greeks_ui = {name: float(curve[spot_idx]) for name, curve in greeks_curve_ui.items()}
 
     a, b, c, d = st.columns(4)
     a.metric("Delta", f"{current_greeks_ui['delta']:.6f}")
@@ -560,35 +733,35 @@ def main():
     st.divider()
     st.header("Export")
 
-    greeks_curve_ui = {
-        "delta": delta,
-        "gamma": gamma,
-        "theta_per_day": theta_day,
-        "vega_per_1pct_vol": vega_1pct,
-    }
-
-    export_data = generate_export_data(
-        spot_price=spot_price, K1=K1, K2=K2, K3=K3, K4=K4,
-        rate_pct=interest_rate_pct,
-        expiration_years=maturity,
-        volatility_pct=volatility_pct,
-        num_steps=N_steps,
-        quantity=executor.max_quantity(strategy),
-        multiplier=multiplier,
-        strategy=strategy,
-        current_greeks_ui=current_greeks_ui,
-        greeks_curve_ui=greeks_curve_ui,
-        spot_range=spot_range_g,
-    )
+    # Files are only built when their button is clicked: Streamlit calls `data` at download time
+    # and on_click="ignore" keeps the click from rerunning the page (and its pricing).
+    # Both need a recent Streamlit (callable data >= 1.50, on_click="ignore" >= 1.43): see requirements.txt
+    def export_data() -> dict:
+        return generate_export_data(
+            spot_price=spot_price, K1=K1, K2=K2, K3=K3, K4=K4,
+            rate_pct=interest_rate_pct,
+            expiration_years=maturity,
+            volatility_pct=volatility_pct,
+            num_steps=N_steps,
+            quantity=quantity,
+            multiplier=multiplier,
+            strategy=strategy,
+            current_greeks_ui=current_greeks_ui,
+            greeks_curve_ui=greeks_curve_ui,
+            spot_range=spot_range_g,
+        )
 
+    # One timestamp for the three file names
+    file_stem = f"iron_condor_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     colx, coly, colz = st.columns(3)
     with colx:
         st.subheader("JSON")
         st.download_button(
             "Télécharger (JSON)",
-            data=export_to_json(export_data),
-            file_name=f"iron_condor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            data=lambda: export_to_json(export_data()),
+            file_name=f"{file_stem}.json",
             mime="application/json",
+            on_click="ignore",
             width="stretch",
         )
 
@@ -596,9 +769,10 @@ def main():
         st.subheader("CSV")
         st.download_button(
             "Télécharger (CSV)",
-            data=export_to_csv(export_data),
-            file_name=f"iron_condor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=lambda: export_to_csv(export_data()),
+            file_name=f"{file_stem}.csv",
             mime="text/csv",
+            on_click="ignore",
             width="stretch",
         )
 
@@ -606,9 +780,10 @@ def main():
         st.subheader("PDF")
         st.download_button(
             "Télécharger (PDF)",
-            data=export_to_pdf(export_data, capital=float(capital)),
-            file_name=f"iron_condor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            data=lambda: export_to_pdf(export_data(), capital=float(capital)),
+            file_name=f"{file_stem}.pdf",
             mime="application/pdf",
+            on_click="ignore",
             width="stretch",
         )
 
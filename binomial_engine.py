@@ -1,10 +1,62 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, Any, List
 import math
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _crr_rollback_numpy(values: np.ndarray, q: float, disc: float, stop: int = 0) -> np.ndarray:
+    # Same in-place induction as the numba kernel, one level per step over the whole batch.
+    # disc is folded into the two weights, and q * up goes to one reused contiguous scratch
+    # buffer, so no temporaries are allocated per level.
+    w_up, w_down = disc * q, disc * (1.0 - q)
+    n_rows, n_nodes = values.shape
+    scratch = np.empty(n_rows * (n_nodes - 1))
+    for i in range(n_nodes - 1, stop, -1):
+        up = np.multiply(values[:, 1:i + 1], w_up, out=scratch[:n_rows * i].reshape(n_rows, i))
+        live = values[:, :i]
+        live *= w_down
+        live += up
+    return values[:, :stop + 1]
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _crr_rollback(values, q, disc, stop=0):
+        # values: (batch, N+1) terminal payoffs, induced in place row by row down to
+        # time level `stop`: values[b, j] <- disc * (q * up + (1 - q) * down)
+        n_rows, n_nodes = values.shape
+        for b in range(n_rows):
+            for i in range(n_nodes - 1, stop, -1):
+                for j in range(i):
+                    values[b, j] = disc * (q * values[b, j + 1] + (1.0 - q) * values[b, j])
+        return values[:, :stop + 1]
+
+    # Compile (or load from the on-disk cache) at import so the first pricing call is hot.
+    _crr_rollback(np.zeros((1, 9)), 0.5, 1.0, 0)
+else:
+    _crr_rollback = _crr_rollback_numpy
+
+
+def _growth(u: float, d: float, level, ups) -> np.ndarray:
+    """
+    Node growth factors u^ups * d^(level - ups), one exp per node instead of two powers.
+    level / ups broadcast like NumPy arrays.
+    """
+    log_u, log_d = math.log(u), math.log(d)
+    return np.exp(level * log_d + ups * (log_u - log_d))
+
+
+# Independent trees (base / bumped) run concurrently: the numba kernel releases the GIL
+_TREE_POOL = ThreadPoolExecutor(max_workers=4)
+
 
 @dataclass
 class BinomialModel:
@@ -27,26 +79,30 @@ class BinomialModel:
     sigma: float
     N: int
 
-    def _params(self):
-        if self.N <= 0:
+    @staticmethod
+    def _lattice(S, r: float, T: float, sigma: float, N: int):
+        """
+        CRR step parameters (dt, u, d, q, disc). S is only validated (scalar or array of spots).
+        """
+        if N <= 0:
             raise ValueError("N must be >= 1")
-        if self.T <= 0:
+        if T <= 0:
             raise ValueError("T must be > 0")
-        if self.S <= 0:
+        if np.any(np.asarray(S) <= 0):
             raise ValueError("S must be > 0")
-        if self.sigma < 0:
+        if sigma < 0:
             raise ValueError("sigma must be >= 0")
 
-        dt = self.T / self.N
+        dt = T / N
         if dt <= 0:
             raise ValueError("Invalid dt")
 
         # CRR
-        u = math.exp(self.sigma * math.sqrt(dt)) if self.sigma > 0 else 1.0
+        u = math.exp(sigma * math.sqrt(dt)) if sigma > 0 else 1.0
         d = 1.0 / u if u != 0 else 0.0
 
-        disc = math.exp(-self.r * dt)
-        a = math.exp(self.r * dt)
+        disc = math.exp(-r * dt)
+        a = math.exp(r * dt)
 
         if abs(u - d) < 1e-14:
             # sigma ~ 0, degenerate: set q=0.5
@@ -59,82 +115,110 @@ class BinomialModel:
 
         return dt, u, d, q, disc
 
+    def _params(self):
+        return self._lattice(self.S, self.r, self.T, self.sigma, self.N)
+
     def price_call(self) -> float:
-        return self._price(option_type="call")
+        return self._price(+1.0)
 
     def price_put(self) -> float:
-        return self._price(option_type="put")
+        return self._price(-1.0)
 
-    def _price(self, option_type: str) -> float:
+    def _price(self, sign: float) -> float:
+        """
+        Price of the option paying max(sign * (S_T - K), 0): +1 = call, -1 = put.
+        """
         dt, u, d, q, disc = self._params()
 
         # Terminal stock prices: S * u^j * d^(N-j)
-        j = np.arange(self.N + 1)
-        ST = self.S * (u ** j) * (d ** (self.N - j))
-
-        if option_type == "call":
-            values = np.maximum(ST - self.K, 0.0)
-        else:
-            values = np.maximum(self.K - ST, 0.0)
+        ST = self.S * _growth(u, d, self.N, np.arange(self.N + 1))
+        values = np.maximum(sign * (ST - self.K), 0.0)
 
         # Backward induction
-        for _ in range(self.N):
-            values = disc * (q * values[1:] + (1.0 - q) * values[:-1])
+        return float(_crr_rollback(values[None, :], q, disc, 0)[0, 0])
+
+    @classmethod
+    def _rollback_many(cls, S, r, T, sigma, N, strikes, option_types, stop: int) -> np.ndarray:
+        dt, u, d, q, disc = cls._lattice(S, r, T, sigma, N)
+
+        growth = _growth(u, d, N, np.arange(N + 1))
+
+        S = np.atleast_1d(np.asarray(S, dtype=float))
+        K = np.asarray(strikes, dtype=float)[None, :, None]
+        sign = np.where(np.asarray(option_types) == "call", 1.0, -1.0)[None, :, None]
+
+        # Terminal payoffs max(sign * (ST - K), 0) built in a single buffer, rolled back in place
+        values = np.empty((S.shape[0], K.shape[1], N + 1))
+        np.subtract(S[:, None, None] * growth, K, out=values)
+        values *= sign
+        np.maximum(values, 0.0, out=values)
+        values = values.reshape(-1, N + 1)
+
+        nodes = _crr_rollback(values, q, disc, stop)
+        return nodes.reshape(S.shape[0], -1, stop + 1)
+
+    @classmethod
+    def price_many(cls, S, r, T, sigma, N, strikes, option_types) -> np.ndarray:
+        """
+        Price several options sharing (S, r, T, sigma, N) in a single rollback.
+        The lattice does not depend on the strike, so terminal payoffs are stacked
+        into a (len(strikes), N+1) matrix and induced together.
+
+        S may also be an array of spots: every option is then priced for each spot
+        and the result has shape (len(S), len(strikes)).
+        """
+        prices = cls._rollback_many(S, r, T, sigma, N, strikes, option_types, 0)[:, :, 0]
+        return prices if np.ndim(S) else prices[0]
 
-        return float(values[0])
+    @classmethod
+    def level_values(cls, S, r, T, sigma, N, strikes, option_types, level: int) -> np.ndarray:
+        """
+        Option values on the nodes of time level `level` (j = 0..level up moves),
+        shape (len(S), len(strikes), level + 1). Same batching as price_many.
+        """
+        if not 0 <= level <= N:
+            raise ValueError("level must be in [0, N]")
+        return cls._rollback_many(S, r, T, sigma, N, strikes, option_types, level)
 
     def get_tree_data(self) -> Dict[str, Any]:
         """
-        Return dict trees as triangular dicts {i:{j:value}}
-        i = time level (0..N)
-        j = node index (0..i) = number of up moves
+        Return the trees as dense (N+1, N+1) float arrays, NaN above the diagonal:
+        tree[i, j] with i = time level (0..N), j = number of up moves (0..i)
         """
         try:
             dt, u, d, q, disc = self._params()
         except Exception as e:
             return {"error": str(e)}
 
-        stock_prices: Dict[int, Dict[int, float]] = {}
-        call_prices: Dict[int, Dict[int, float]] = {}
-        put_prices: Dict[int, Dict[int, float]] = {}
+        i = np.arange(self.N + 1)[:, None]
+        j = np.arange(self.N + 1)[None, :]
+        lower = j <= i
 
         # Stock tree
-        for i in range(self.N + 1):
-            stock_prices[i] = {}
-            for j in range(i + 1):
-                stock_prices[i][j] = float(self.S * (u ** j) * (d ** (i - j)))
-
-        # Terminal option values
-        call_prices[self.N] = {}
-        put_prices[self.N] = {}
-        for j in range(self.N + 1):
-            ST = stock_prices[self.N][j]
-            call_prices[self.N][j] = float(max(ST - self.K, 0.0))
-            put_prices[self.N][j] = float(max(self.K - ST, 0.0))
-
-        # Backward
-        for i in range(self.N - 1, -1, -1):
-            call_prices[i] = {}
-            put_prices[i] = {}
-            for j in range(i + 1):
-                call_up = call_prices[i + 1][j + 1]
-                call_dn = call_prices[i + 1][j]
-                put_up = put_prices[i + 1][j + 1]
-                put_dn = put_prices[i + 1][j]
-
-                call_prices[i][j] = float(disc * (q * call_up + (1.0 - q) * call_dn))
-                put_prices[i][j] = float(disc * (q * put_up + (1.0 - q) * put_dn))
+        stock_prices = np.where(lower, self.S * _growth(u, d, i, j), np.nan)
+
+        # Terminal option values (row 0 = call, row 1 = put), then backward level by level
+        options = np.full((2, self.N + 1, self.N + 1), np.nan)
+        ST = stock_prices[self.N]
+        options[0, self.N] = np.maximum(ST - self.K, 0.0)
+        options[1, self.N] = np.maximum(self.K - ST, 0.0)
+        for level in range(self.N - 1, -1, -1):
+            nxt = options[:, level + 1]
+            options[:, level, :level + 1] = disc * (q * nxt[:, 1:level + 2] + (1.0 - q) * nxt[:, :level + 1])
 
         return {
             "stock_prices": stock_prices,
-            "call_prices": call_prices,
-            "put_prices": put_prices,
+            "call_prices": options[0],
+            "put_prices": options[1],
         }
 
 
 class MultiLegGreeksCalculator:
     """
-    Compute strategy greeks by finite differences using BinomialModel.
+    Compute strategy greeks with BinomialModel.
+
+    Delta, gamma and theta are read from the first two levels of the CRR tree;
+    vega uses a central finite difference (sigma +/- bump), the only extra trees.
 
     legs = list of dict:
       {"K": float, "type": "call"/"put", "sign": +1/-1}
@@ -156,71 +240,69 @@ class MultiLegGreeksCalculator:
         self.sigma = float(volatility)
         self.N = int(n_steps)
 
-    def _price_strategy(self, S: float, T: float | None = None, sigma: float | None = None) -> float:
-        T_ = self.T if T is None else float(T)
-        sig_ = self.sigma if sigma is None else float(sigma)
-
-        total = 0.0
-        for leg in self.legs:
-            m = BinomialModel(
-                S=float(S),
-                K=float(leg["K"]),
-                r=self.r,
-                T=T_,
-                sigma=sig_,
-                N=self.N,
-            )
-            if leg["type"] == "call":
-                px = m.price_call()
-            else:
-                px = m.price_put()
-            total += float(leg["sign"]) * px
-        return float(total)
+    def _legs_arrays(self):
+        strikes = [float(leg["K"]) for leg in self.legs]
+        types = [leg["type"] for leg in self.legs]
+        signs = np.array([float(leg["sign"]) for leg in self.legs])
+        return strikes, types, signs
 
-    def calculate_strategy_greeks(self) -> dict:
-        # Prices along spot curve
-        V = np.array([self._price_strategy(S) for S in self.spot_range], dtype=float)
-
-        # Bumps
-        # delta/gamma: bump in spot
-        dS = np.maximum(0.01 * self.spot_range, 0.50)  # at least 0.50 currency unit
-        V_up = np.array([self._price_strategy(S + bump) for S, bump in zip(self.spot_range, dS)], dtype=float)
-        V_dn = np.array([self._price_strategy(max(1e-9, S - bump)) for S, bump in zip(self.spot_range, dS)], dtype=float)
+    def _price_strategy_curve(self, spots: np.ndarray, sigma: float | None = None) -> np.ndarray:
+        """
+        Strategy value for every spot at once: all legs share the lattice, so they are
+        rolled back together over a (len(spots) * n_legs, N+1) payoff matrix.
+        """
+        spots = np.asarray(spots, dtype=float)
+        strikes, types, signs = self._legs_arrays()
+        sigma = self.sigma if sigma is None else float(sigma)
+        return BinomialModel.price_many(spots, self.r, self.T, sigma, self.N, strikes, types) @ signs
 
-        delta = (V_up - V_dn) / (2.0 * dS)
-        gamma = (V_up - 2.0 * V + V_dn) / (dS ** 2)
+    def _greeks(self, spots: np.ndarray) -> dict:
+        if self.N < 2:
+            raise ValueError("N must be >= 2 to read greeks from the tree")
 
-        # Theta: 1 day
-        dT = 1.0 / 365.0
-        T_dn = max(1e-6, self.T - dT)
-        V_Tdn = np.array([self._price_strategy(S, T=T_dn) for S in self.spot_range], dtype=float)
-        theta = (V_Tdn - V) / dT  # dV/dT (approx). Often reported negative for decay; here it's derivative.
+        spots = np.asarray(spots, dtype=float)
+        strikes, types, signs = self._legs_arrays()
+        dt, u, d, q, disc = BinomialModel._lattice(spots, self.r, self.T, self.sigma, self.N)
 
-        # Vega: +1% vol bump (0.01 in decimal)
+        # Vega: central difference on +/-1% vol (0.01 in decimal), priced while the base tree is rolled back
         dSig = 0.01
-        V_sig_up = np.array([self._price_strategy(S, sigma=self.sigma + dSig) for S in self.spot_range], dtype=float)
-        vega = (V_sig_up - V) / dSig
-
-        return {"price": V, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+        sig_up = self.sigma + dSig
+        sig_dn = max(0.0, self.sigma - dSig)
+        sig_up_future = _TREE_POOL.submit(self._price_strategy_curve, spots, sig_up)
+        sig_dn_future = _TREE_POOL.submit(self._price_strategy_curve, spots, sig_dn)
+
+        # Strategy values on level 2 (nodes S*d^2, S, S*u^2 since u*d = 1), then levels 1 and 0
+        V2 = BinomialModel.level_values(spots, self.r, self.T, self.sigma, self.N, strikes, types, level=2)
+        V2 = V2.transpose(0, 2, 1) @ signs
+        V1 = disc * (q * V2[:, 1:] + (1.0 - q) * V2[:, :-1])
+        V = disc * (q * V1[:, 1] + (1.0 - q) * V1[:, 0])
+
+        if u - d < 1e-14:
+            # sigma ~ 0: the tree does not move (u = d = 1), bump the spot instead
+            dS = np.maximum(0.01 * spots, 0.50)  # at least 0.50 currency unit
+            V_up, V_dn = np.split(
+                self._price_strategy_curve(np.concatenate([spots + dS, np.maximum(1e-9, spots - dS)])), 2
+            )
+            delta = (V_up - V_dn) / (2.0 * dS)
+            gamma = (V_up - 2.0 * V + V_dn) / (dS ** 2)
+        else:
+            delta = (V1[:, 1] - V1[:, 0]) / (spots * (u - d))
+            gamma = (
+                (V2[:, 2] - V2[:, 1]) / (spots * (u * u - 1.0))
+                - (V2[:, 1] - V2[:, 0]) / (spots * (1.0 - d * d))
+            ) / (0.5 * spots * (u * u - d * d))
 
-    def get_greeks_at_spot(self, spot: float) -> dict:
-        # Compute at single point with same method
-        S = float(spot)
-        V = self._price_strategy(S)
+        # Theta: same spot two steps later (middle node of level 2), per year
+        theta = (V2[:, 1] - V) / (2.0 * dt)
 
-        dS = max(0.01 * S, 0.50)
-        V_up = self._price_strategy(S + dS)
-        V_dn = self._price_strategy(max(1e-9, S - dS))
-        delta = (V_up - V_dn) / (2.0 * dS)
-        gamma = (V_up - 2.0 * V + V_dn) / (dS ** 2)
+        vega = (sig_up_future.result() - sig_dn_future.result()) / (sig_up - sig_dn)
 
-        dT = 1.0 / 365.0
-        T_dn = max(1e-6, self.T - dT)
-        V_Tdn = self._price_strategy(S, T=T_dn)
-        theta = (V_Tdn - V) / dT
+        return {"price": V, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
 
-        dSig = 0.01
-        V_sig_up = self._price_strategy(S, sigma=self.sigma + dSig)
-        vega = (V_sig_up - V) / dSig
+    def calculate_strategy_greeks(self) -> dict:
+        return self._greeks(self.spot_range)
 
-        return {"price": V, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+    def get_greeks_at_spot(self, spot: float) -> dict:
+        # Compute at single point with same method
+        g = self._greeks(np.array([float(spot)]))
+        return {k: float(v[0]) for k, v in g.items()}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 import numpy as np
@@ -19,6 +20,9 @@ AVAILABLE_STOCKS = {
     "NVDA": "NVIDIA",
 }
 
+# yf.download keeps its results in module-level state: concurrent calls must not overlap
+_YF_LOCK = threading.Lock()
+
 
 @dataclass
 class MarketDataProvider:
@@ -32,7 +36,8 @@ class MarketDataProvider:
 
     def _fetch(self) -> Optional[pd.DataFrame]:
         try:
-            df = yf.download(self.ticker, period=self.period, auto_adjust=True, progress=False)
+            with _YF_LOCK:
+                df = yf.download(self.ticker, period=self.period, auto_adjust=True, progress=False)
             if df is None or df.empty:
                 return None
             return df
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property
 from typing import List, Dict, Any, Tuple
 import numpy as np
 
@@ -45,15 +46,34 @@ class ShortIronCondor:
         m = BinomialModel(S=self.p.S, K=K, r=self.p.r, T=self.p.T, sigma=self.p.sigma, N=self.p.N)
         return m.price_call() if opt_type == "call" else m.price_put()
 
+    @cached_property
+    def _leg_prices(self) -> np.ndarray:
+        # Priced once per instance: payoff, extrema, breakevens and sizing all need the net cost
+        legs = self.legs_definition()
+        prices = BinomialModel.price_many(
+            self.p.S, self.p.r, self.p.T, self.p.sigma, self.p.N,
+            [leg["K"] for leg in legs], [leg["type"] for leg in legs],
+        )
+        prices.setflags(write=False)
+        return prices
+
+    @cached_property
+    def _net_cost(self) -> float:
+        signs = np.array([float(leg["sign"]) for leg in self.legs_definition()])
+        return float(signs @ self._leg_prices)
+
+    def leg_prices(self) -> np.ndarray:
+        """
+        Prices of all legs (legs_definition order) from one shared CRR lattice.
+        Computed on first use and kept on the instance (params are not expected to change).
+        """
+        return self._leg_prices
+
     def net_cost_per_share(self) -> float:
         """
         Sum(sign * option_price). Negative => credit received.
         """
-        total = 0.0
-        for leg in self.legs_definition():
-            px = self.price_leg(leg["type"], leg["K"])
-            total += float(leg["sign"]) * float(px)
-        return float(total)
+        return self._net_cost
 
     def payoff_at_maturity(self, ST: float) -> float:
         """
@@ -76,17 +96,27 @@ class ShortIronCondor:
         return float(intrinsic - self.net_cost_per_share())
 
     def payoff_curve(self, spot_array: np.ndarray) -> np.ndarray:
-        spot_array = np.asarray(spot_array, dtype=float)
-        return np.array([self.payoff_at_maturity(s) for s in spot_array], dtype=float)
+        """
+        Vectorized payoff_at_maturity: intrinsics as array ops, net cost priced once.
+        """
+        ST = np.asarray(spot_array, dtype=float)
+        K1, K2, K3, K4 = self.p.K1, self.p.K2, self.p.K3, self.p.K4
+
+        intrinsic = (
+            np.maximum(K1 - ST, 0.0)
+            - np.maximum(K2 - ST, 0.0)
+            - np.maximum(ST - K3, 0.0)
+            + np.maximum(ST - K4, 0.0)
+        )
+        return intrinsic - self.net_cost_per_share()
 
     def _key_points_for_extrema(self) -> List[float]:
         mid = 0.5 * (self.p.K2 + self.p.K3)
         return [0.0, self.p.K1, self.p.K2, mid, self.p.K3, self.p.K4, self.p.K4 * 2.0]
 
     def max_profit_loss(self) -> Tuple[float, float]:
-        pts = self._key_points_for_extrema()
-        vals = [self.payoff_at_maturity(x) for x in pts]
-        return float(max(vals)), float(min(vals))
+        vals = self.payoff_curve(self._key_points_for_extrema())
+        return float(vals.max()), float(vals.min())
 
     def breakevens(self) -> List[float]:
         """
@@ -95,21 +125,17 @@ class ShortIronCondor:
         lo = max(1e-9, self.p.K1 * 0.5)
         hi = self.p.K4 * 1.5
         grid = np.linspace(lo, hi, 2000)
-        y = np.array([self.payoff_at_maturity(x) for x in grid], dtype=float)
-
-        bes = []
-        for i in range(len(grid) - 1):
-            y0, y1 = y[i], y[i + 1]
-            if y0 == 0.0:
-                bes.append(float(grid[i]))
-            if y0 * y1 < 0:
-                # linear interpolation
-                x0, x1 = grid[i], grid[i + 1]
-                xb = x0 + (0 - y0) * (x1 - x0) / (y1 - y0)
-                bes.append(float(xb))
+        y = self.payoff_curve(grid)
+
+        y0, y1 = y[:-1], y[1:]
+        x0, x1 = grid[:-1], grid[1:]
+        exact = x0[y0 == 0.0]
+        # linear interpolation on sign changes
+        cross = y0 * y1 < 0
+        xb = x0[cross] + (0 - y0[cross]) * (x1[cross] - x0[cross]) / (y1[cross] - y0[cross])
 
         # clean duplicates
-        bes_sorted = sorted(bes)
+        bes_sorted = sorted(float(b) for b in np.concatenate([exact, xb]))
         cleaned = []
         for b in bes_sorted:
             if not cleaned or abs(b - cleaned[-1]) > 1e-2:
@@ -118,8 +144,7 @@ class ShortIronCondor:
 
     def get_strategy_details(self) -> Dict[str, Any]:
         legs_rows = []
-        for leg in self.legs_definition():
-            px = self.price_leg(leg["type"], leg["K"])
+        for leg, px in zip(self.legs_definition(), self.leg_prices()):
             legs_rows.append(
                 {
                     "Jambe": leg["label"],